@@ -1,9 +1,35 @@
 # type: ignore
 import requests
 import os
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from requests.exceptions import HTTPError, ConnectionError, Timeout, RequestException
 
+load_dotenv()
+API_KEY = os.getenv("API_KEY")
+API_URL = "http://www.omdbapi.com/"
+
+# requests does not guarantee Session is thread-safe, and get_movie_data_many
+# calls the API from worker threads, so every thread keeps its own session.
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """
+    Return the HTTP session of the current thread, creating it on first use.
+
+    Returns:
+        requests.Session: A session reusing keep-alive connections within this thread.
+    """
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({"User-Agent": "movie-app/1.0"})
+        _thread_local.session = session
+    return session
+
 
 def get_movie_data(movie_name: str) -> dict:
     """
@@ -19,19 +45,33 @@ def get_movie_data(movie_name: str) -> dict:
         ValueError: If API key is missing.
         Exception: For any HTTP or network-related errors.
     """
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    if not api_key:
+    if not API_KEY:
         raise ValueError("API key is not set. Please set the API_KEY environment variable.")
-    
-    url = "http://www.omdbapi.com/"
+    return _fetch_movie_data(movie_name.strip().casefold())
+
+
+@lru_cache(maxsize=256)
+def _fetch_movie_data(movie_name: str) -> dict:
+    """
+    Fetch movie data from the OMDB API, caching responses per normalized movie name.
+    Failed requests raise and are therefore not cached.
+
+    Args:
+        movie_name (str): The normalized name of the movie to search for.
+
+    Returns:
+        dict: The movie data returned by the API.
+
+    Raises:
+        Exception: For any HTTP or network-related errors.
+    """
     params = {
-        'apikey': api_key,
+        'apikey': API_KEY,
         't': movie_name,
     }
 
     try:
-        response = requests.get(url, params=params, timeout=5)
+        response = _get_session().get(API_URL, params=params, timeout=5)
         response.raise_for_status()
         return response.json()
     
@@ -43,3 +83,26 @@ def get_movie_data(movie_name: str) -> dict:
         raise Exception("The request timed out.")
     except RequestException as err:
         raise Exception(f"An unexpected error occurred: {err}")
+
+
+def get_movie_data_many(movie_names: list[str], max_workers: int = 8) -> dict:
+    """
+    Fetch data for several movies from the OMDB API concurrently.
+
+    Args:
+        movie_names (list[str]): The names of the movies to search for.
+        max_workers (int): The maximum number of requests in flight at once.
+
+    Returns:
+        dict: Maps every movie name to its API data, or to the exception raised while fetching it.
+    """
+    def fetch(movie_name: str) -> dict | Exception:
+        try:
+            return get_movie_data(movie_name)
+        except Exception as e:
+            return e
+
+    if not movie_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(movie_names))) as executor:
+        return dict(zip(movie_names, executor.map(fetch, movie_names)))
@@ -1,50 +1,181 @@
 # type: ignore
-from sqlalchemy import create_engine, text
+from sqlalchemy import RowMapping, bindparam, create_engine, event, text
+from sqlalchemy.pool import QueuePool
+from collections import defaultdict
+from collections.abc import Iterator
 import os
+import random
 
 
 
 engine = None
+# Same pool as `engine`, but its transactions start with BEGIN IMMEDIATE
+write_engine = None
+
+# Memoized movie listings keyed by (user_id, query), tagged with the user's mutation version
+_movies_cache: dict[tuple[int, str], tuple[int, dict | tuple]] = {}
+_version: dict[int, int] = defaultdict(int)
+
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-20000",
+    "mmap_size=268435456",
+    "busy_timeout=5000",
+    "foreign_keys=ON",
+)
+
+_SQL_CREATE_USERS_TABLE = text("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL
+    );
+""")
+_SQL_CREATE_MOVIES_TABLE = text("""
+    CREATE TABLE IF NOT EXISTS movies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        rating REAL NOT NULL,
+        poster_image_url TEXT,
+        imdb_id TEXT UNIQUE,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    );
+""")
+_SQL_CREATE_USER_TITLE_INDEX = text("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_movies_user_title ON movies(user_id, title);
+""")
+_SQL_CREATE_USER_RATING_INDEX = text("""
+    CREATE INDEX IF NOT EXISTS idx_movies_user_rating ON movies(user_id, rating DESC);
+""")
+_SQL_UPSERT_USER = text("""
+    INSERT INTO users (username) VALUES (:username)
+    ON CONFLICT(username) DO UPDATE SET username = excluded.username
+    RETURNING id
+""")
+_SQL_LIST_MOVIES = text("SELECT title, year, rating, poster_image_url, imdb_id FROM movies WHERE user_id = :user_id")
+_SQL_LIST_MOVIES_BASIC = text("SELECT title, year, rating FROM movies WHERE user_id = :user_id")
+_SQL_RANDOM_MOVIE = text("SELECT title, year, rating FROM movies WHERE user_id = :user_id ORDER BY RANDOM() LIMIT 1")
+_SQL_MOVIE_EXISTS = text("SELECT 1 FROM movies WHERE user_id = :user_id AND title = :title LIMIT 1")
+_SQL_EXISTING_TITLES = text("SELECT title FROM movies WHERE user_id = :user_id AND title IN :titles").bindparams(
+    bindparam("titles", expanding=True)
+)
+_SQL_EXISTING_IMDB_IDS = text("SELECT imdb_id FROM movies WHERE imdb_id IN :imdb_ids").bindparams(
+    bindparam("imdb_ids", expanding=True)
+)
+_SQL_ADD_MOVIE = text("""
+    INSERT INTO movies (title, year, rating, poster_image_url, user_id, imdb_id)
+    VALUES (:title, :year, :rating, :poster_image_url, :user_id, :imdb_id)
+    ON CONFLICT DO NOTHING
+""")
+_SQL_DELETE_MOVIE = text("DELETE FROM movies WHERE title = :title AND user_id = :user_id")
+_SQL_SEARCH_MOVIE = text("SELECT title, rating FROM movies WHERE user_id = :user_id AND title LIKE :title ESCAPE '\\'")
+_SQL_SORT_MOVIES_BY_RATING = text("SELECT title, rating FROM movies WHERE user_id = :user_id ORDER BY rating DESC")
+_SQL_GET_STATS = text("""
+    WITH stats AS (
+        SELECT AVG(rating) AS average_rating, MIN(rating) AS min_rating, MAX(rating) AS max_rating, COUNT(*) AS movie_count
+        FROM movies WHERE user_id = :user_id
+    )
+    SELECT average_rating, min_rating, max_rating, movie_count, (
+        SELECT AVG(rating) FROM (
+            SELECT rating FROM movies WHERE user_id = :user_id
+            ORDER BY rating
+            LIMIT 2 - (SELECT movie_count FROM stats) % 2
+            OFFSET (SELECT (movie_count - 1) / 2 FROM stats)
+        )
+    ) AS median_rating
+    FROM stats
+""")
+_SQL_EXTREME_MOVIES = text("SELECT title, rating FROM movies WHERE user_id = :user_id AND rating IN (:min_rating, :max_rating)")
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Apply the SQLite PRAGMAs to a freshly opened connection.
+
+    Args:
+        dbapi_connection: The raw sqlite3 connection.
+        connection_record: The pool record of the connection (unused).
+
+    Returns:
+        None
+    """
+    # Let SQLAlchemy emit BEGIN itself instead of the driver's implicit deferred BEGIN
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+def begin_transaction(connection) -> None:
+    """
+    Start a transaction, using the mode given by the "transaction_mode" execution option.
+
+    Args:
+        connection: The SQLAlchemy connection starting the transaction.
+
+    Returns:
+        None
+    """
+    mode = connection.get_execution_options().get("transaction_mode", "DEFERRED")
+    connection.exec_driver_sql(f"BEGIN {mode}")
+
 
 def init_storage() -> None:
-    """Initialize the database connection.
+    """Initialize the database connection pool.
+    The engine is created once and kept alive for the lifetime of the process,
+    so repeated calls are no-ops.
     Returns:
         None
     """
-    global engine
+    global engine, write_engine
+    if engine is not None:
+        return
     base_dir = os.path.dirname(os.path.abspath(__file__))
     db_path = os.path.join(base_dir, "..", "databases", "movies.db")
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     DB_URL = f"sqlite:///{db_path}"
-    engine = create_engine(DB_URL, echo=False)
+    engine = create_engine(
+        DB_URL,
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=0,
+        pool_pre_ping=False,
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(engine, "begin", begin_transaction)
+    # Writers take the write lock up front instead of upgrading mid-transaction
+    write_engine = engine.execution_options(transaction_mode="IMMEDIATE")
     create_table()
 
+def close_storage() -> None:
+    """Close all pooled database connections.
+    Returns:
+        None
+    """
+    global engine, write_engine
+    if engine is None:
+        return
+    engine.dispose()
+    engine = None
+    write_engine = None
+
 def create_table() -> None:
     """
     Create the movies table in the database if it does not exist.
     Returns:
         None
     """
-    with engine.connect() as connection:
-        connection.execute(text("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL
-            );
-        """))
-        connection.execute(text("""
-            CREATE TABLE IF NOT EXISTS movies (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                year INTEGER NOT NULL,
-                rating REAL NOT NULL,
-                poster_image_url TEXT,
-                imdb_id TEXT UNIQUE,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            );
-        """))
-        connection.commit()
+    with write_engine.begin() as connection:
+        connection.execute(_SQL_CREATE_USERS_TABLE)
+        connection.execute(_SQL_CREATE_MOVIES_TABLE)
+        connection.execute(_SQL_CREATE_USER_TITLE_INDEX)
+        connection.execute(_SQL_CREATE_USER_RATING_INDEX)
 
 
 def get_or_create_user(username: str) -> int:
@@ -57,49 +188,165 @@ def get_or_create_user(username: str) -> int:
     Returns:
         int: The user_id of the existing or newly created user.
     """
-    with engine.connect() as connection:
-        # Check if user exists
-        result = connection.execute(
-            text("SELECT id FROM users WHERE username = :username"),
-            {"username": username}
-        ).fetchone()
-
-        if result:
-            return result[0]  # user_id already exists
-
-        # Create new user
-        connection.execute(
-            text("INSERT INTO users (username) VALUES (:username)"),
-            {"username": username}
-        )
-        connection.commit()
+    with write_engine.begin() as connection:
+        # Insert the user, or touch the existing row, and get its id back in one statement
+        return connection.execute(_SQL_UPSERT_USER, {"username": username}).scalar()
 
-        # Retrieve the new user's ID
-        new_user_id = connection.execute(
-            text("SELECT id FROM users WHERE username = :username"),
-            {"username": username}
-        ).fetchone()[0]
 
-        return new_user_id
 
+def invalidate_movies_cache(user_id: int) -> None:
+    """
+    Mark the cached movie listings of a user as stale after a write.
+    Args:
+        user_id (int): The id of the user.
+    Returns:
+        None
+    """
+    _version[user_id] += 1
+    for kind in ("full", "basic", "titles"):
+        _movies_cache.pop((user_id, kind), None)
+
+
+def _get_cached(user_id: int, kind: str) -> dict | tuple | None:
+    """
+    Return a memoized listing of a user if it is still up to date.
+    Args:
+        user_id (int): The id of the user.
+        kind (str): The listing, one of "full", "basic" or "titles".
+    Returns:
+        dict | tuple | None: The memoized listing, or None if it is missing or stale.
+    """
+    cached = _movies_cache.get((user_id, kind))
+    if cached and cached[0] == _version[user_id]:
+        return cached[1]
+    return None
 
 
 def list_movies(user_id: int) -> dict:
     """
     Retrieve all movies from the database.
+    The result is memoized per user until the next add or delete.
     Returns:
         dict: A dictionary where the keys are movie titles and the values are dictionaries with year and rating.
     """
+    cached = _get_cached(user_id, "full")
+    if cached is not None:
+        return cached
     with engine.connect() as connection:
-        result = connection.execute(text("SELECT title, year, rating, poster_image_url, imdb_id FROM movies WHERE user_id = :user_id"), {
+        result = connection.execute(_SQL_LIST_MOVIES, {
             "user_id": user_id
         })
-        movies = result.fetchall()
-    return {row[0]: {"year": row[1], "rating": row[2], "poster_image_url": row[3], "imdb_id": row[4]} for row in movies}
+        movies = {
+            row["title"]: {"year": row["year"], "rating": row["rating"], "poster_image_url": row["poster_image_url"], "imdb_id": row["imdb_id"]}
+            for row in result.mappings()
+        }
+    _movies_cache[(user_id, "full")] = (_version[user_id], movies)
+    return movies
+
+def list_movies_basic(user_id: int) -> dict:
+    """
+    Retrieve all movies of a user without their poster and IMDb id.
+    The result is memoized per user until the next add or delete.
+    Returns:
+        dict: A dictionary where the keys are movie titles and the values are dictionaries with year and rating.
+    """
+    cached = _get_cached(user_id, "basic")
+    if cached is not None:
+        return cached
+    with engine.connect() as connection:
+        result = connection.execute(_SQL_LIST_MOVIES_BASIC, {
+            "user_id": user_id
+        })
+        movies = {row["title"]: {"year": row["year"], "rating": row["rating"]} for row in result.mappings()}
+    _movies_cache[(user_id, "basic")] = (_version[user_id], movies)
+    return movies
+
+def get_random_movie(user_id: int) -> dict | RowMapping | None:
+    """
+    Pick a random movie of a user in the database.
+    When an up-to-date listing of the user is memoized, the movie is picked from it
+    by index instead of sorting the table with ORDER BY RANDOM().
+    Args:
+        user_id (int): The id of the user.
+    Returns:
+        dict | RowMapping | None: The title, year and rating of the movie, or None if the user has no movies.
+    """
+    movies = _get_cached(user_id, "basic")
+    if movies is not None:
+        if not movies:
+            return None
+        titles = _get_cached(user_id, "titles")
+        if titles is None:
+            titles = tuple(movies)
+            _movies_cache[(user_id, "titles")] = (_version[user_id], titles)
+        title = titles[random.randrange(len(titles))]
+        return {"title": title, **movies[title]}
+    with engine.connect() as connection:
+        result = connection.execute(_SQL_RANDOM_MOVIE, {
+            "user_id": user_id
+        })
+        return result.mappings().first()
+
+def movie_exists(title: str, user_id: int) -> bool:
+    """
+    Check whether a movie with the given title exists for a user.
+    Answered from a memoized listing of the user when one is up to date.
+    Args:
+        title (str): The title of the movie.
+        user_id (int): The id of the user.
+    Returns:
+        bool: True if the movie exists, False otherwise.
+    """
+    for kind in ("basic", "full"):
+        cached = _get_cached(user_id, kind)
+        if cached is not None:
+            return title in cached
+    with engine.connect() as connection:
+        result = connection.execute(_SQL_MOVIE_EXISTS, {
+            "user_id": user_id,
+            "title": title
+        })
+        return result.first() is not None
+
+def existing_titles(titles: list[str], user_id: int) -> set[str]:
+    """
+    Find which of the given titles already exist for a user, in a single query.
+    Args:
+        titles (list[str]): The titles to check.
+        user_id (int): The id of the user.
+    Returns:
+        set[str]: The titles that exist in the database.
+    """
+    if not titles:
+        return set()
+    with engine.connect() as connection:
+        result = connection.execute(_SQL_EXISTING_TITLES, {
+            "user_id": user_id,
+            "titles": list(titles)
+        })
+        return set(result.scalars())
+
+def existing_imdb_ids(imdb_ids: list[str]) -> set[str]:
+    """
+    Find which of the given IMDb ids are already stored by any user, in a single query.
+    IMDb ids are unique across the whole movies table, not per user.
+    Args:
+        imdb_ids (list[str]): The IMDb ids to check.
+    Returns:
+        set[str]: The IMDb ids that exist in the database.
+    """
+    if not imdb_ids:
+        return set()
+    with engine.connect() as connection:
+        result = connection.execute(_SQL_EXISTING_IMDB_IDS, {
+            "imdb_ids": list(imdb_ids)
+        })
+        return set(result.scalars())
 
 def add_movie(title: str, year: int, rating: float, poster_image_url: str, user_id: int, imdb_id: str) -> None:
     """
-    Add a new movie to the database.
+    Add a new movie to the database, unless the user already has a movie with that title
+    or the IMDb id is already stored. Both checks and the insert are one atomic statement.
     Args:
         title (str): The title of the movie.
         year (int): The release year of the movie.
@@ -108,12 +355,9 @@ def add_movie(title: str, year: int, rating: float, poster_image_url: str, user_
     Returns:
         None
     """
-    with engine.connect() as connection:
-        try:
-            connection.execute(text("""
-                INSERT INTO movies (title, year, rating, poster_image_url, user_id, imdb_id)
-                VALUES (:title, :year, :rating, :poster_image_url, :user_id, :imdb_id)
-            """), {
+    try:
+        with write_engine.begin() as connection:
+            result = connection.execute(_SQL_ADD_MOVIE, {
                 "title": title,
                 "year": year,
                 "rating": rating,
@@ -121,10 +365,33 @@ def add_movie(title: str, year: int, rating: float, poster_image_url: str, user_
                 "poster_image_url": poster_image_url,
                 "imdb_id": imdb_id,
             })
-            connection.commit()
-            print(f"Movie '{title}' added successfully.")
-        except Exception as e:
-            print(f"Error adding movie: {e}")
+        if result.rowcount == 0:
+            print(f"Movie '{title}' already exists (same title in this profile or same IMDb id).")
+            return
+        invalidate_movies_cache(user_id)
+        print(f"Movie '{title}' added successfully.")
+    except Exception as e:
+        print(f"Error adding movie: {e}")
+
+def add_movies_bulk(movies: list[dict], user_id: int) -> None:
+    """
+    Add several movies to the database in a single transaction.
+    Movies whose title or IMDb id is already stored are skipped.
+    Args:
+        movies (list[dict]): Dictionaries with title, year, rating, poster_image_url and imdb_id.
+        user_id (int): The id of the user.
+    Returns:
+        None
+    """
+    if not movies:
+        return
+    try:
+        with write_engine.begin() as connection:
+            result = connection.execute(_SQL_ADD_MOVIE, [{**movie, "user_id": user_id} for movie in movies])
+        invalidate_movies_cache(user_id)
+        print(f"{result.rowcount} movies added successfully.")
+    except Exception as e:
+        print(f"Error adding movies: {e}")
 
 def delete_movie(title: str, user_id: int) -> None:
     """
@@ -134,43 +401,79 @@ def delete_movie(title: str, user_id: int) -> None:
     Returns:
         None
     """
-    with engine.connect() as connection:
-        try:
-            result = connection.execute(text("DELETE FROM movies WHERE title = :title AND user_id = :user_id"), {"title": title, "user_id": user_id})
-            connection.commit()
-            if result.rowcount == 0:
-                print(f"No movie found with title '{title}'.")
-            else:
-                print(f"Movie '{title}' deleted successfully.")
-        except Exception as e:
-            print(f"Error deleting movie: {e}")
+    try:
+        with write_engine.begin() as connection:
+            result = connection.execute(_SQL_DELETE_MOVIE, {"title": title, "user_id": user_id})
+        invalidate_movies_cache(user_id)
+        if result.rowcount == 0:
+            print(f"No movie found with title '{title}'.")
+        else:
+            print(f"Movie '{title}' deleted successfully.")
+    except Exception as e:
+        print(f"Error deleting movie: {e}")
 
 
-def search_movie(title: str, user_id: int) -> list[dict[str, str | float]]:
+def search_movie(title: str, user_id: int) -> list[RowMapping]:
     """
     Search for a movie by title in the database.
+    The substring match runs in SQLite; "%" and "_" in the search text match literally.
+    Case-insensitivity comes from SQLite's LIKE and covers ASCII letters only.
     Args:
         title (str): The title of the movie to search for.
     Returns:
-        list[dict[str, str | float]]: A list of dictionaries with movie titles and ratings.
+        list[RowMapping]: A list of mappings with movie titles and ratings.
     """
+    escaped_title = title.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
     with engine.connect() as connection:
-        result = connection.execute(text("SELECT title, rating FROM movies WHERE title LIKE :title AND user_id = :user_id"), {
-            "title": f"%{title}%",
+        result = connection.execute(_SQL_SEARCH_MOVIE, {
+            "title": f"%{escaped_title}%",
             "user_id": user_id
         })
-        rows = result.fetchall()
-    return [{"title": row[0], "rating": row[1]} for row in rows] if rows else []
+        return result.mappings().all()
 
-def sort_movies_by_rating(user_id: int) -> list[dict[str, str | float]]:
+def sort_movies_by_rating(user_id: int) -> Iterator[RowMapping]:
     """
     Sort movies by rating in descending order.
+    Rows are streamed from the cursor; the connection is returned to the pool
+    once the iterator is exhausted or closed.
     Returns:
-        list[dict[str, str | float]]: A list of dictionaries with movie titles and ratings, sorted by rating.
+        Iterator[RowMapping]: Mappings with movie titles and ratings, sorted by rating.
     """
     with engine.connect() as connection:
-        result = connection.execute(text("SELECT title, rating FROM movies WHERE user_id = :user_id ORDER BY rating DESC"), {
+        result = connection.execute(_SQL_SORT_MOVIES_BY_RATING, {
             "user_id": user_id
         })
-        rows = result.fetchall()
-    return [{"title": row[0], "rating": row[1]} for row in rows]
+        yield from result.mappings()
+
+
+def get_stats(user_id: int) -> tuple:
+    """
+    Compute the rating statistics of a user's movies in the database.
+    Args:
+        user_id (int): The id of the user.
+    Returns:
+        tuple: (average_rating, min_rating, max_rating, count, median_rating). The ratings are None if the user has no movies.
+    """
+    with engine.connect() as connection:
+        result = connection.execute(_SQL_GET_STATS, {
+            "user_id": user_id
+        })
+        return tuple(result.fetchone())
+
+def get_extreme_movies(user_id: int, min_rating: float, max_rating: float) -> list[RowMapping]:
+    """
+    Retrieve a user's movies rated exactly the minimum or the maximum rating.
+    Args:
+        user_id (int): The id of the user.
+        min_rating (float): The lowest rating of the user's movies.
+        max_rating (float): The highest rating of the user's movies.
+    Returns:
+        list[RowMapping]: A list of mappings with movie titles and ratings.
+    """
+    with engine.connect() as connection:
+        result = connection.execute(_SQL_EXTREME_MOVIES, {
+            "user_id": user_id,
+            "min_rating": min_rating,
+            "max_rating": max_rating
+        })
+        return result.mappings().all()
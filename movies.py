@@ -1,10 +1,48 @@
 # type: ignore
-import random
 import os
-from statistics import median as get_median
+import re
+import sys
+import atexit
+import json
+import hashlib
+from functools import lru_cache
+from operator import itemgetter
+from itertools import chain
+from collections.abc import Iterator
 import data.movie_storage_sql as storage
 import data.API_communication as api
 
+HTML_ESCAPE_TABLE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+})
+
+RATING_RE = re.compile(r"(?=.*\d)0*(?:10(?:\.0*)?|\d?(?:\.\d*)?)")
+
+BASE_DIR = os.path.dirname(__file__)  # directory of the current script
+WEBSITE_DIR = os.path.join(BASE_DIR, "website")
+TEMPLATE_PATH = os.path.join(WEBSITE_DIR, "index_template.html")
+WEBSITE_CACHE_PATH = os.path.join(WEBSITE_DIR, ".website_cache")
+MOVIE_ITEM_TEMPLATE = (
+    '<li><div class="movie">'
+    '<a href="https://www.imdb.com/title/{imdb_id}" target="_blank">'
+    '<img class="movie-poster" src="{poster}" alt="{title} poster"></a>'
+    '<div class="movie-title">{title}</div>'
+    '<div class="movie-rating">IMDb: {rating}</div>'
+    '<div class="movie-year">{year}</div>'
+    '</div></li>\n'
+)
+TEMPLATE_PLACEHOLDER_RE = re.compile(r"__TEMPLATE_(MOVIE_GRID|TITLE)__")
+
+PROFILES_PATH = "data/profiles.txt"
+
+# Parsed profiles file and the mtime it was read at, see get_profiles
+_profiles_cache: list[str] | None = None
+_profiles_mtime: float | None = None
+
 
 def pause() -> None:
     """
@@ -17,10 +55,13 @@ def pause() -> None:
     input("\nPress Enter to continue.")
 
 
-def get_valid_name() -> str:
+def get_valid_name(user_id: int) -> str:
     """
     Ensures the given movie name is a non-empty string.
 
+    Args:
+        user_id (int): The id of the user whose movies are checked.
+
     Returns:
         str: A valid movie name.
 
@@ -32,7 +73,7 @@ def get_valid_name() -> str:
         movie_name = input("Enter the movie name: ").strip()
         if not movie_name:
             raise ValueError("You have to enter a movie name.")
-        if movie_name not in storage.list_movies(user_id):
+        if not storage.movie_exists(movie_name, user_id):
             raise KeyError(f"Movie '{movie_name}' does not exist in the database.")
         return movie_name
 
@@ -40,21 +81,18 @@ def get_valid_name() -> str:
 def get_valid_rating() -> float:
     """
     Ensures the given rating is float between 0 and 10 included.
+    Input is validated with a regex, so invalid entries are rejected without
+    raising and catching exceptions. Plain decimals such as "7", "05", ".5" and
+    "7." are accepted; signs and exponents ("+5", "1e1") are not.
 
     Returns:
         float: A float between 0 and 10.
-
-    Raises:
-        ValueError: If the input is not a valid float or is outside the range of 0.0 to 10.0.
     """
     while True:
-        try:
-            rating = float(input("Enter a decimal movie rating (0.0–10.0): "))
-            if not 0 <= rating <= 10:
-                raise ValueError
-            return rating
-        except ValueError:
-            print("Invalid rating. Please enter a number between 0.0 and 10.0.")
+        rating = input("Enter a decimal movie rating (0.0–10.0): ").strip()
+        if RATING_RE.fullmatch(rating):
+            return float(rating)
+        print("Invalid rating. Please enter a number between 0.0 and 10.0.")
 
 
 def list_movies(user_id: int) -> None:
@@ -66,12 +104,13 @@ def list_movies(user_id: int) -> None:
     Raises:
         ValueError: If no movies are found in the database.
     """
-    movies = storage.list_movies(user_id)
+    movies = storage.list_movies_basic(user_id)
     if not movies:
         raise ValueError("No movies found in the database.")
-    print(f"{len(movies)} movies in total")
-    for movie, data in movies.items():
-        print(f"{movie} ({data['year']}): {data['rating']}")
+    lines = [f"{len(movies)} movies in total"]
+    lines.extend(f"{movie} ({data['year']}): {data['rating']}" for movie, data in movies.items())
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
 
 def add_movie(movie_name: str, user_id: int) -> None:
@@ -92,25 +131,101 @@ def add_movie(movie_name: str, user_id: int) -> None:
     """
     if not movie_name:
         raise ValueError("Movie name must be provided.")
-    movies = storage.list_movies(user_id)
-    if movie_name in movies:
-            raise ValueError(f"Movie '{movie_name}' already exists.")
+    if storage.movie_exists(movie_name, user_id):
+        raise ValueError(f"Movie '{movie_name}' already exists.")
     try:
         movie_data = api.get_movie_data(movie_name)
     except Exception as e:
         print(f"Could not fetch movie data: {e}")
         return  # stop further execution
+    movie = extract_movie_details(movie_name, movie_data)
+    storage.add_movie(movie["title"], movie["year"], movie["rating"], movie["poster_image_url"], user_id, movie["imdb_id"])
+
+
+def extract_movie_details(movie_name: str, movie_data: dict) -> dict:
+    """
+    Extract the fields stored in the database from an OMDb API response.
+
+    Args:
+        movie_name (str): The name the movie was searched by.
+        movie_data (dict): The movie data returned by the API.
+
+    Returns:
+        dict: The title, year, rating, poster_image_url and imdb_id of the movie.
+
+    Raises:
+        ValueError: If the API returned no data or the title, year or rating is missing.
+    """
     if not movie_data:
         raise ValueError(f"Movie '{movie_name}' not found in the database.")
-    
-    movie_title = movie_data.get("Title", "Unknown")
-    movie_year = movie_data.get("Year", "Unknown")
-    movie_rating = movie_data.get("imdbRating", "Unknown")
-    movie_imdb_id = movie_data.get("imdbID", "Unknown")
-    poster_image_url = movie_data.get("Poster", "Unknown")
-    if movie_title == "Unknown" or movie_year == "Unknown" or movie_rating == "Unknown":
+
+    movie = {
+        "title": movie_data.get("Title", "Unknown"),
+        "year": movie_data.get("Year", "Unknown"),
+        "rating": movie_data.get("imdbRating", "Unknown"),
+        "poster_image_url": movie_data.get("Poster", "Unknown"),
+        "imdb_id": movie_data.get("imdbID", "Unknown"),
+    }
+    if movie["title"] == "Unknown" or movie["year"] == "Unknown" or movie["rating"] == "Unknown":
         raise ValueError("Movie data not found. Please check the movie name.")
-    storage.add_movie(movie_title, movie_year, movie_rating, poster_image_url, user_id, movie_imdb_id)
+    return movie
+
+
+def add_movies(movie_names: list[str], user_id: int) -> None:
+    """
+    Add several movies to the movie database, fetching their data concurrently.
+    Movies that already exist for this user, whose IMDb id is already stored
+    by any profile, or that cannot be fetched are reported and skipped, so one
+    conflicting movie does not abort the batch.
+
+    Args:
+        movie_names (list[str]): The names of the movies.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If no movie names are given.
+    """
+    movie_names = list(dict.fromkeys(name for name in movie_names if name))
+    if not movie_names:
+        raise ValueError("At least one movie name must be provided.")
+
+    already_added = storage.existing_titles(movie_names, user_id)
+    names_to_fetch = []
+    for movie_name in movie_names:
+        if movie_name in already_added:
+            print(f"Skipping '{movie_name}': movie already exists.")
+        else:
+            names_to_fetch.append(movie_name)
+
+    movies = {}
+    imdb_ids = set()
+    for movie_name, movie_data in api.get_movie_data_many(names_to_fetch).items():
+        if isinstance(movie_data, Exception):
+            print(f"Could not fetch movie data for '{movie_name}': {movie_data}")
+            continue
+        try:
+            movie = extract_movie_details(movie_name, movie_data)
+        except ValueError as v_e:
+            print(f"Skipping '{movie_name}': {v_e}")
+            continue
+        if movie["title"] in movies or movie["imdb_id"] in imdb_ids:
+            print(f"Skipping '{movie_name}': movie '{movie['title']}' already exists.")
+            continue
+        movies[movie["title"]] = movie
+        imdb_ids.add(movie["imdb_id"])
+
+    for title in storage.existing_titles(list(movies), user_id):
+        print(f"Skipping '{title}': movie already exists.")
+        del movies[title]
+
+    taken_imdb_ids = storage.existing_imdb_ids([movie["imdb_id"] for movie in movies.values()])
+    for title in [title for title, movie in movies.items() if movie["imdb_id"] in taken_imdb_ids]:
+        print(f"Skipping '{title}': movie is already stored by another profile.")
+        del movies[title]
+
+    storage.add_movies_bulk(list(movies.values()), user_id)
 
 
 def delete_movie(movie_name: str, user_id: int) -> None:
@@ -146,34 +261,23 @@ def movies_stats(user_id: int) -> tuple:
         ValueError: If the movie database is empty.
     """
 
-    dict_of_movies = storage.list_movies(user_id)
-    if not dict_of_movies:
+    average_rating, min_rating, max_rating, count, median_rating = storage.get_stats(user_id)
+    if not count:
         raise ValueError("No movies found.")
-    ratings = list((data["rating"] for movie, data in dict_of_movies.items()))
-    sum_of_ratings = sum(ratings)
-
-    max_rating = max(data["rating"] for movie, data in dict_of_movies.items())
-    best_movies = [
-    (movie, data["rating"])
-    for movie, data in dict_of_movies.items()
-    if data["rating"] == max_rating
-]
-    min_rating = min(data["rating"] for movie, data in dict_of_movies.items())
-    worst_movies = [
-    (movie, data["rating"])
-    for movie, data in dict_of_movies.items()
-    if data["rating"] == min_rating
-    ]
-
-    average_rating = sum_of_ratings / len(ratings)
-    median_rating = get_median(ratings)
+    best_movies = []
+    worst_movies = []
+    for title, rating in map(itemgetter("title", "rating"), storage.get_extreme_movies(user_id, min_rating, max_rating)):
+        if rating == max_rating:
+            best_movies.append((title, rating))
+        if rating == min_rating:
+            worst_movies.append((title, rating))
 
     return average_rating, best_movies, worst_movies, median_rating
 
 
 def get_random_movie(user_id: int) -> dict:
     """
-    Return a random movie dict from the list of dictionaries of movies.
+    Return a random movie dict, picked by the database.
 
     Returns:
         dict: A randomly selected movie dict.
@@ -181,13 +285,12 @@ def get_random_movie(user_id: int) -> dict:
     Raises:
         ValueError: If the database is empty.
     """
-    dicts_of_movies = storage.list_movies(user_id)
-    if not dicts_of_movies:
+    movie = storage.get_random_movie(user_id)
+    if not movie:
         raise ValueError("No movies found in the database.")
-    title, details = random.choice(list(dicts_of_movies.items()))
-    if not details or 'rating' not in details:
+    if movie['rating'] is None:
         raise ValueError("Movie details are incomplete.")
-    return {'title': title, **details}
+    return dict(movie)
 
 
 def search_movie(part_of_movie_name: str, user_id: int) -> list[dict]:
@@ -209,25 +312,27 @@ def search_movie(part_of_movie_name: str, user_id: int) -> list[dict]:
     return list_of_movie_dicts
 
 
-def sort_movies_by_rating(user_id: int) -> list[dict]:
+def sort_movies_by_rating(user_id: int) -> Iterator[dict]:
     """
     Sort movies by rating in descending order.
 
     Returns:
-        list[dict]: A list of dictionaries with movie titles and ratings.
+        Iterator[dict]: Movie titles and ratings, streamed from the database.
 
     Raises:
-        ValueError: If the dictionary is empty.
+        ValueError: If there are no movies.
     """
-    sorted_movie_list =  storage.sort_movies_by_rating(user_id)
-    if not sorted_movie_list:
+    sorted_movies = storage.sort_movies_by_rating(user_id)
+    first_movie = next(sorted_movies, None)
+    if first_movie is None:
         raise ValueError("No movies found to sort.")
-    return sorted_movie_list
+    return chain((first_movie,), sorted_movies)
 
 
 def get_profiles() -> list[str]:
     """
     Get all available profiles in the movie database.
+    The profiles file is read once and then served from memory.
 
     Returns:
         list[str]: A list of profile names.
@@ -235,11 +340,24 @@ def get_profiles() -> list[str]:
     Raises:
         ValueError: If no profiles are found.
     """
-    with open("data/profiles.txt", "r") as file:
-        profiles = [line.strip() for line in file if line.strip()]
-    if not profiles:
-        return []
-    return profiles
+    global _profiles_cache, _profiles_mtime
+    if _profiles_cache is None:
+        with open(PROFILES_PATH, "r") as file:
+            _profiles_cache = [line.strip() for line in file if line.strip()]
+        _profiles_mtime = os.stat(PROFILES_PATH).st_mtime
+    return list(_profiles_cache)
+
+
+def invalidate_profiles_if_changed() -> None:
+    """
+    Drop the cached profiles if the profiles file was modified since it was read.
+
+    Returns:
+        None
+    """
+    global _profiles_cache
+    if _profiles_cache is not None and os.stat(PROFILES_PATH).st_mtime != _profiles_mtime:
+        _profiles_cache = None
 
 
 def list_profiles() -> list[str]:
@@ -274,11 +392,15 @@ def create_new_profile() -> None:
     Returns:
         None
     """
-    with open("data/profiles.txt", "a") as file:
-        new_profile = get_name()
+    global _profiles_mtime
+    new_profile = get_name()
+    with open(PROFILES_PATH, "a") as file:
         file.write(f"{new_profile}\n")
-        print(f"Profile '{new_profile}' created successfully.")
-        return new_profile
+    if _profiles_cache is not None:
+        _profiles_cache.append(new_profile)
+        _profiles_mtime = os.stat(PROFILES_PATH).st_mtime
+    print(f"Profile '{new_profile}' created successfully.")
+    return new_profile
 
 
 def select_profile() -> str:
@@ -310,9 +432,8 @@ def select_profile() -> str:
 
 
 def change_profile() -> str:
-    profile = select_profile()
-    storage.init_storage()
-    return profile
+    invalidate_profiles_if_changed()
+    return select_profile()
 
 
 def get_name() -> str:
@@ -332,9 +453,62 @@ def get_name() -> str:
         return name
 
 
+@lru_cache(maxsize=4)
+def load_template(template_path: str, mtime: float) -> list[str]:
+    """
+    Read the website template and split it at its placeholders, caching the
+    result until the file is modified.
+
+    Args:
+        template_path (str): The path of the template file.
+        mtime (float): The modification time of the template, part of the cache key.
+
+    Returns:
+        list[str]: Literal template text at even indexes, placeholder names
+            ("MOVIE_GRID" or "TITLE") at odd indexes.
+    """
+    with open(template_path, "rb") as file:
+        return TEMPLATE_PLACEHOLDER_RE.split(file.read().decode("utf-8"))
+
+
+def website_fingerprint(name: str, dict_of_movies: dict, template_mtime: float) -> str:
+    """
+    Compute a fingerprint of everything a generated website depends on.
+
+    Args:
+        name (str): The name of the website.
+        dict_of_movies (dict): The movies shown on the website.
+        template_mtime (float): The modification time of the template.
+
+    Returns:
+        str: A hex digest that changes whenever the website content would change.
+    """
+    content = repr((name, template_mtime, MOVIE_ITEM_TEMPLATE, sorted(dict_of_movies.items())))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def read_website_cache(cache_path: str) -> dict:
+    """
+    Read the fingerprints of previously generated websites.
+
+    Args:
+        cache_path (str): The path of the JSON sidecar file.
+
+    Returns:
+        dict: Maps website names to their fingerprint and file mtime, empty if the file is missing or unreadable.
+    """
+    try:
+        with open(cache_path, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
 def generate_website(name: str, user_id: int) -> None:
     """
     Generate a static HTML website for the movie database.
+    Regeneration is skipped if neither the movies nor the template changed
+    since the website was last written.
 
     Args:
         name (str): The name of the website.
@@ -346,41 +520,249 @@ def generate_website(name: str, user_id: int) -> None:
         ValueError: If the database is empty.
     """
 
-    base_dir = os.path.dirname(__file__)  # directory of the current script
-    template_path = os.path.join(base_dir, "website", "index_template.html")
-    index_path = os.path.join(base_dir, "website", f"{name}.html")
-
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Template file not found: {template_path}")
+    index_path = os.path.join(WEBSITE_DIR, f"{name}.html")
 
-    with open(template_path, "r") as file:
-        template = file.read()
+    try:
+        template_mtime = os.path.getmtime(TEMPLATE_PATH)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Template file not found: {TEMPLATE_PATH}")
     dict_of_movies = storage.list_movies(user_id)
 
     if not dict_of_movies:
         raise ValueError("No movies found in the database to generate a website.")
-    movies_html = ""
+
+    fingerprint = website_fingerprint(name, dict_of_movies, template_mtime)
+    website_cache = read_website_cache(WEBSITE_CACHE_PATH)
+    cached = website_cache.get(name)
+    if (cached and cached["fingerprint"] == fingerprint
+            and os.path.exists(index_path) and os.path.getmtime(index_path) == cached["mtime"]):
+        print(f"Website at /website/{name}.html is already up to date.")
+        return
+
+    template_segments = load_template(TEMPLATE_PATH, template_mtime)
+    parts = []
+    append = parts.append
+    escape_table = HTML_ESCAPE_TABLE
+    format_item = MOVIE_ITEM_TEMPLATE.format
     for movie, data in dict_of_movies.items():
-        movies_html += f"""
-        <li>
-            <div class="movie">
-                <a href="https://www.imdb.com/title/{data['imdb_id']}" target="_blank">
-                    <img class="movie-poster" src="{data['poster_image_url']}" alt="{movie} poster">
-                </a>
-                <div class="movie-title">{movie}</div>
-                <div class="movie-rating">IMDb: {data['rating']}</div>
-                <div class="movie-year">{data['year']}</div>
-            </div>
-        </li>
-        """
-    html_content = template.replace("__TEMPLATE_MOVIE_GRID__", movies_html)
-    html_content = html_content.replace("__TEMPLATE_TITLE__", f"Movie Database of {name}")
-    with open(index_path, "w") as file:
-        file.write(html_content)
+        append(format_item(
+            imdb_id=(data['imdb_id'] or "").translate(escape_table),
+            poster=(data['poster_image_url'] or "").translate(escape_table),
+            title=movie.translate(escape_table),
+            rating=data['rating'],
+            year=data['year'],
+        ))
+    # Write the template segments in order, filling in placeholders, so the page never exists as one string.
+    # The page is written as UTF-8 bytes to a temporary file and then atomically moved into place.
+    title = f"Movie Database of {name}".translate(HTML_ESCAPE_TABLE).encode("utf-8")
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "wb") as file:
+        for i, segment in enumerate(template_segments):
+            if i % 2 == 0:
+                file.write(segment.encode("utf-8"))
+            elif segment == "MOVIE_GRID":
+                file.writelines(part.encode("utf-8") for part in parts)
+            else:
+                file.write(title)
+    os.replace(tmp_path, index_path)
+    website_cache[name] = {"fingerprint": fingerprint, "mtime": os.path.getmtime(index_path)}
+    with open(WEBSITE_CACHE_PATH, "w") as file:
+        json.dump(website_cache, file)
     print(f"Website generated successfully at /website/{name}.html.")
-    pause()
         
 
+def handle_list_movies(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 1: list all movies of the current user.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If no movies are found in the database.
+    """
+    list_movies(user_id)
+
+
+def handle_add_movie(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 2: add a movie fetched from the OMDb API.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the movie already exists or its data is incomplete.
+    """
+    while not (movie_name := input("Enter movie name: ").strip()):
+        print("Invalid input. You have to enter a movie name.")
+    add_movie(movie_name, user_id)
+
+
+def handle_delete_movie(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 3: delete a movie after the user confirms it.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the movie name is empty.
+        KeyError: If the movie does not exist in the database.
+    """
+    movie_name = get_valid_name(user_id)
+    confirm = input(f"Are you sure you want to delete '{movie_name}'? (y/n): ").lower()
+    if confirm != "y":
+        print("Deletion cancelled.")
+        return
+    delete_movie(movie_name, user_id)
+
+
+def handle_stats(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 4: print the average, median, best and worst ratings.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the database is empty.
+    """
+    average_rating, best_movies, worst_movies, median_rating = movies_stats(user_id)
+    print(f"Average rating: {average_rating}")
+    print(f"Median rating: {median_rating}")
+    print(f"Best movie(s):")
+    for movie, rating in best_movies:
+        print(f"\t{movie}, {rating}")
+    print(f"Worst movie(s):")
+    for movie, rating in worst_movies:
+        print(f"\t{movie}, {rating}")
+
+
+def handle_random_movie(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 5: suggest a random movie.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the database is empty.
+    """
+    random_movie = get_random_movie(user_id)
+    print(f"Your movie for tonight: {random_movie['title']},"
+          f" it's rated {random_movie['rating']}.")
+
+
+def handle_search_movie(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 6: search movies by part of their name.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If no movie matches.
+    """
+    while not (part_of_movie_name := input("Enter a part of the movie name: ").strip()):
+        print("You have to enter a part of the movie name.")
+    for movie in search_movie(part_of_movie_name, user_id):
+        print(f"{movie['title']}: {movie['rating']}")
+
+
+def handle_sort_movies(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 7: list movies sorted by rating, best first.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If there are no movies.
+    """
+    for movie in sort_movies_by_rating(user_id):
+        print(f"{movie['title']}: {movie['rating']}")
+
+
+def handle_generate_website(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 8: generate the website of the current profile.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the database is empty.
+        FileNotFoundError: If the website template is missing.
+    """
+    generate_website(current_profile, user_id)
+
+
+def handle_add_movies(current_profile: str, user_id: int) -> None:
+    """
+    Menu option 10: add several movies at once.
+
+    Args:
+        current_profile (str): The name of the current profile.
+        user_id (int): The id of the current user.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If no movie names are given.
+    """
+    movie_names = [name.strip() for name in input("Enter movie names separated by commas: ").split(",")]
+    add_movies(movie_names, user_id)
+
+
+# Every handler takes (current_profile, user_id) so main() can dispatch any
+# menu choice with a single call; most handlers only need user_id.
+MENU_HANDLERS = {
+    "1": handle_list_movies,
+    "2": handle_add_movie,
+    "3": handle_delete_movie,
+    "4": handle_stats,
+    "5": handle_random_movie,
+    "6": handle_search_movie,
+    "7": handle_sort_movies,
+    "8": handle_generate_website,
+    "10": handle_add_movies,
+}
+
+
 def main():
     """
     Main loop for the movie database CLI. Presents options to the user
@@ -388,9 +770,11 @@ def main():
     """
     print("Welcome to the Movie Database CLI!")
 
-    if not os.path.exists("data/profiles.txt"):
-        with open("data/profiles.txt", "w") as file:
+    if not os.path.exists(PROFILES_PATH):
+        with open(PROFILES_PATH, "w") as file:
             file.write("")
+    storage.init_storage()
+    atexit.register(storage.close_storage)
     current_profile = change_profile()
     user_id = storage.get_or_create_user(current_profile)
 
@@ -409,137 +793,39 @@ def main():
         7. Movies sorted by rating
         8. Generate website
         9. Change profile
+        10. Add multiple movies
 
-        Enter choice (0-9):
+        Enter choice (0-10):
 
         """
 
         user_choice = input(menu_text)
 
+        # Quitting and switching profiles change the loop state, so they are handled here
         if user_choice == "0":
             confirm = input("Are you sure you want to quit? (y/n): ").lower()
             if confirm == "y":
                 print("Goodbye!")
                 break
 
-        elif user_choice == "1":
-            try:
-                list_movies(user_id)
-            except ValueError as v_e:
-                print(f"Error: {v_e}")
-            except KeyError as k_e:
-                print(f"Error: {k_e}")
-            except Exception as e:
-                print(f"An unexpected error occurred while listing movies: {e}")
-            pause()
-
-        elif user_choice == "2":
-            while True:
-                movie_name = input("Enter movie name: ")
-                if movie_name:
-                    break
-                else:
-                    print("Invalid input. You have to enter a movie name.")
-            try:
-                add_movie(movie_name, user_id)
-            except ValueError as v_e:
-                print(f"Error: {v_e}")
-            except KeyError as k_e:
-                print(f"Error: {k_e}")
-            
-            pause()
-
-        elif user_choice == "3":
-            try:
-                movie_name = get_valid_name()
-                confirm = input(f"Are you sure you want to delete '{movie_name}'? (y/n): ").lower()
-                if confirm != "y":
-                    print("Deletion cancelled.")
-                    continue
-                # Call the delete_movie function to remove the movie from the database
-                delete_movie(movie_name, user_id)
-
-            except KeyError as k_e:
-                print(f"Error: {k_e}")
-
-            finally:
-                pause()
-
-
-        elif user_choice == "4":
-            try:
-                average_rating, best_movies, worst_movies, median_rating = movies_stats(user_id)
-                print(f"Average rating: {average_rating}")
-                print(f"Median rating: {median_rating}")
-                print(f"Best movie(s):")
-                for movie, rating in best_movies:
-                   print(f"\t{movie}, {rating}")
-                print(f"Worst movie(s):")
-                for movie, rating in worst_movies:
-                    print(f"\t{movie}, {rating}")
-
-            except ValueError as v_e:
-                print(f"Error: {v_e}")
-
-            finally:
-                pause()
-
-        elif user_choice == "5":
-            try:
-                random_movie = get_random_movie(user_id)
-                print(f"Your movie for tonight: {random_movie['title']},"
-                      f" it's rated {random_movie['rating']}.")
-
-            except ValueError as v_e:
-                print(f"Error: {v_e}")
-                
-
-            finally:
-                pause()
-
-        elif user_choice == "6":
-            try:
-                while True:
-                    part_of_movie_name = input("Enter a part of the movie name: ")
-                    if part_of_movie_name:
-                        break
-                    else:
-                        print("You have to enter a part of the movie name.")
-                list_of_movies_with_part_in_it = search_movie(part_of_movie_name, user_id)
-                for movie in list_of_movies_with_part_in_it:
-                    print(f"{movie['title']}: {movie['rating']}")
-
-            except ValueError as v_e:
-                print(f"Error: {v_e}.")
-
-            except KeyError as k_e:
-                print(f"Error: {k_e}.")
-
-            finally:
-                pause()
-
-        elif user_choice == "7":
-            try:
-                movies_sorted_by_rating = sort_movies_by_rating(user_id)
-                for movie in movies_sorted_by_rating:
-                    print(f"{movie['title']}: {movie['rating']}")
-
-            except ValueError as v_e:
-                print(f"Error: {v_e}.")
-
-            finally:
-                pause()
-
-        elif user_choice == "8":
-            generate_website(current_profile, user_id)
-
         elif user_choice == "9":
             current_profile = change_profile()
             user_id = storage.get_or_create_user(current_profile)
 
         else:
-            print("Invalid choice. Please choose a number between 0 and 9.")
-            pause()
+            handler = MENU_HANDLERS.get(user_choice)
+            if handler is None:
+                print("Invalid choice. Please choose a number between 0 and 10.")
+                pause()
+                continue
+            try:
+                handler(current_profile, user_id)
+            except (ValueError, KeyError) as e:
+                print(f"Error: {e}")
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+            finally:
+                pause()
 
 
 if __name__ == "__main__":